@@ -0,0 +1,9 @@
+"""
+Daily report of Copilot reviews on pull requests in Hillspire repositories.
+
+The work is split into steps that can run separately from the command line
+(see cli.py): fetch PRs and Copilot reviews from GitHub into a cached dataset,
+render it as the HTML report, and send it by email.
+"""
+
+__version__ = "0.1.0"
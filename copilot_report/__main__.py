@@ -0,0 +1,6 @@
+from copilot_report.cli import main
+
+
+# Guarded: render worker processes re-import the main module
+if __name__ == '__main__':
+    main()
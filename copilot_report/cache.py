@@ -0,0 +1,45 @@
+"""
+Persistent cache/state directory shared by all commands.
+
+Everything that should survive between runs lives in one directory, so CI can
+restore it with actions/cache:
+
+    dataset.json     last fetched PRs and Copilot reviews
+    http-cache.json  ETags and bodies of GitHub responses, for conditional requests
+    report.html      last rendered report (report-weekly.html etc. for other windows)
+"""
+
+import json
+import os
+
+
+def get_cache_dir(path=None):
+    """Return the cache directory, creating it if needed.
+
+    Resolved from path, then COPILOT_REPORT_CACHE_DIR, then
+    $XDG_CACHE_HOME/copilot-report (default ~/.cache/copilot-report).
+    """
+    if not path:
+        path = os.environ.get('COPILOT_REPORT_CACHE_DIR')
+    if not path:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        path = os.path.join(base, 'copilot-report')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def load_json(path, default=None):
+    """Load a JSON file, returning default if it is missing or unreadable."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path, data):
+    """Write a JSON file atomically, so an interrupted run never leaves a torn file."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
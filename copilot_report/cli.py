@@ -0,0 +1,237 @@
+"""
+Command line entry point: copilot-report (or python -m copilot_report).
+
+    copilot-report fetch      fetch PRs and Copilot reviews into the cached dataset
+    copilot-report render     render the cached dataset in one or more formats
+    copilot-report dry-run    render and build the email without sending it
+    copilot-report send       render the cached dataset and send it by email
+    copilot-report run        fetch, render and send in one pass (the daily job)
+
+All formats are rendered from the same dataset (see renderers.py), e.g.
+`copilot-report render -f table -f markdown -f json` after a single fetch.
+Likewise all report windows (see windows.py): `copilot-report run -w daily
+-w weekly` fetches the last 7 days once and sends a daily and a weekly email.
+
+Modules that pull in requests, smtplib or email are imported inside the
+command that needs them, so render and dry-run start without loading them.
+State shared between commands and runs lives in one cache directory (see
+cache.py), which CI can persist with actions/cache.
+"""
+
+import argparse
+import os
+import sys
+
+from copilot_report.cache import get_cache_dir
+
+
+# Formats offered on the command line; kept here so parsing does not import renderers
+REPORT_FORMATS = ['table', 'email', 'markdown', 'json']
+EMAIL_FORMATS = ['table', 'email']
+REPORT_WINDOWS = ['daily', 'weekly', 'monthly']
+
+
+def _report_path(cache_dir, window, name, extension):
+    """Path of a rendered report; daily reports keep their original file names."""
+    prefix = 'report' if window == 'daily' else f'report-{window}'
+    return os.path.join(cache_dir, f'{prefix}-{name}.{extension}' if name else f'{prefix}.{extension}')
+
+
+def _fetch(org, cache_dir, window, format_comment=None):
+    """Fetch the dataset for window and save it, rendering sections with format_comment if given."""
+    from copilot_report import github
+    from copilot_report.dataset import save_dataset
+    from copilot_report.pipeline import fetch_dataset, print_pipeline_stats, run_report_pipeline
+
+    http_cache_path = os.path.join(cache_dir, 'http-cache.json')
+    github.start_deadline()
+    github.load_http_cache(http_cache_path)
+
+    if os.environ.get('REPORT_PIPELINE', '1') != '0':
+        # Fetch and render open and closed PRs in one concurrent pass
+        dataset, open_prs_body, closed_prs_body, stages = run_report_pipeline(org, format_comment, window)
+        print_pipeline_stats(stages)
+        sections = (open_prs_body, closed_prs_body) if format_comment else None
+    else:
+        dataset = fetch_dataset(org, window)
+        sections = None
+
+    github.save_http_cache(http_cache_path)
+    save_dataset(cache_dir, dataset)
+
+    if dataset['skipped']:
+        from copilot_report.render import describe_skipped
+        print(f"Partial report: {describe_skipped(dataset['skipped'])}")
+    return dataset, sections
+
+
+def _load(cache_dir):
+    from copilot_report.dataset import load_dataset
+
+    dataset = load_dataset(cache_dir)
+    if dataset is None:
+        sys.exit(f"No dataset in {cache_dir}; run 'copilot-report fetch' first")
+    return dataset
+
+
+def _windows(args, dataset=None):
+    """Windows requested on the command line, default the dataset's own (or daily)."""
+    if args.windows:
+        return list(dict.fromkeys(args.windows))
+    return [dataset['window']['name'] if dataset else 'daily']
+
+
+def _render_email(dataset, format_name, sections=None):
+    """Return (subject, HTML document) of the email in the given format."""
+    from copilot_report import render
+    from copilot_report.renderers import get_renderer
+
+    renderer = get_renderer(format_name)
+    if not renderer.email:
+        raise ValueError(f"{format_name} is not an email format")
+    skipped = dataset.get('skipped')
+    window = dataset['window']['name']
+    if sections is None:
+        html_content = renderer.render(dataset)
+    else:
+        # Sections were already rendered by the fetch pipeline
+        html_content = render.build_report_html(render.combine_sections(*sections, window), skipped, window)
+    return render.report_subject(skipped, window), html_content
+
+
+def _write_formats(dataset, format_names, cache_dir, output=None):
+    """Render the dataset once per format into report[-<window>]-<format>.<ext> files."""
+    from copilot_report.renderers import get_renderer
+
+    for name in format_names:
+        renderer = get_renderer(name)
+        _write(output or _report_path(cache_dir, dataset['window']['name'], name, renderer.extension),
+               renderer.render(dataset))
+
+
+def _write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    print(f"Wrote {path}")
+
+
+def cmd_fetch(args):
+    from copilot_report.windows import widest_window
+
+    dataset, _ = _fetch(args.org, args.cache_dir, widest_window(_windows(args)))
+    print(f"Fetched {sum(len(repo['prs']) for repo in dataset['repos'])} PRs "
+          f"in {len(dataset['repos'])} repositories")
+
+
+def _load_windows(args):
+    """Load the cached dataset and slice it into each requested window."""
+    from copilot_report.dataset import slice_dataset
+
+    dataset = _load(args.cache_dir)
+    try:
+        return [slice_dataset(dataset, window) for window in _windows(args, dataset)]
+    except ValueError as e:
+        sys.exit(str(e))
+
+
+def cmd_render(args):
+    formats = args.formats or ['table']
+    datasets = _load_windows(args)
+    if args.output and len(formats) * len(datasets) > 1:
+        sys.exit("--output can only be used with a single --format and --window")
+    for dataset in datasets:
+        _write_formats(dataset, formats, args.cache_dir, args.output)
+
+
+def cmd_dry_run(args):
+    for dataset in _load_windows(args):
+        subject, html_content = _render_email(dataset, args.format)
+        _write(_report_path(args.cache_dir, dataset['window']['name'], None, 'html'), html_content)
+        print(f"Subject: {subject}")
+    print("Email not sent (dry run)")
+
+
+def cmd_send(args):
+    from copilot_report.mail import build_message, send_email
+
+    for dataset in _load_windows(args):
+        subject, html_content = _render_email(dataset, args.format)
+        send_email(build_message(html_content, subject))
+
+
+def cmd_run(args):
+    from copilot_report.dataset import slice_dataset
+    from copilot_report.mail import build_message, send_email
+    from copilot_report.renderers import get_renderer
+    from copilot_report.windows import widest_window
+
+    windows = _windows(args)
+    fetch_window = widest_window(windows)
+    # The pipeline's sections only match the fetched window, so render them
+    # while fetching only when that is the one report being sent
+    format_comment = get_renderer(args.format).format_comment if windows == [fetch_window] else None
+    dataset, sections = _fetch(args.org, args.cache_dir, fetch_window, format_comment)
+
+    for window in windows:
+        window_dataset = slice_dataset(dataset, window)
+        subject, html_content = _render_email(window_dataset, args.format,
+                                              sections if window == fetch_window else None)
+        _write(_report_path(args.cache_dir, window, None, 'html'), html_content)
+        if args.also_render:
+            _write_formats(window_dataset, args.also_render, args.cache_dir)
+        print("Sending email...")
+        send_email(build_message(html_content, subject))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='copilot-report',
+        description='Daily report of Copilot reviews on pull requests in an organization.')
+    parser.add_argument('--cache-dir', help='cache/state directory (default: '
+                        '$COPILOT_REPORT_CACHE_DIR or ~/.cache/copilot-report)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for name, func, needs_org, help_text in [
+        ('fetch', cmd_fetch, True, 'fetch PRs and Copilot reviews into the cached dataset'),
+        ('render', cmd_render, False, 'render the cached dataset in one or more formats'),
+        ('dry-run', cmd_dry_run, False, 'render and build the email without sending it'),
+        ('send', cmd_send, False, 'render the cached dataset and send it by email'),
+        ('run', cmd_run, True, 'fetch, render and send in one pass'),
+    ]:
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.set_defaults(func=func)
+        if needs_org:
+            subparser.add_argument('--org', default=os.environ.get('ORG_NAME'),
+                                   help='GitHub organization (default: $ORG_NAME)')
+        subparser.add_argument('--window', '-w', dest='windows', action='append', choices=REPORT_WINDOWS,
+                               help='report window, repeat for several (default: daily when fetching, '
+                               'otherwise the window of the cached dataset)')
+        if name == 'render':
+            subparser.add_argument('--format', '-f', dest='formats', action='append', choices=REPORT_FORMATS,
+                                   help='output format, repeat for several (default: table)')
+            subparser.add_argument('--output', '-o', help='output file for a single format '
+                                   '(default: report-<format>.<ext> in the cache dir)')
+        else:
+            if name != 'fetch':
+                subparser.add_argument('--format', '-f', default='table', choices=EMAIL_FORMATS,
+                                       help='email format (default: table)')
+            if name == 'run':
+                subparser.add_argument('--also-render', action='append', choices=REPORT_FORMATS,
+                                       help='also write this format to the cache dir, repeat for several')
+
+    args = parser.parse_args(argv)
+    if getattr(args, 'org', '') is None:
+        parser.error('--org or ORG_NAME is required')
+    args.cache_dir = get_cache_dir(args.cache_dir)
+
+    try:
+        args.func(args)
+    except Exception as e:
+        print(f"Error in main execution: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+The intermediate dataset passed from the fetch step to rendering and sending.
+
+A dataset is a plain JSON-serializable dict:
+
+    {
+        "version": 1,
+        "org": "Hillspire",
+        "fetched_at": "2025-06-23T10:00:00Z",
+        "window": {"name": "daily", "start": "2025-06-22", "end": "2025-06-23"},
+        "skipped": ["repo-a"],
+        "repos": [
+            {"name": "repo-b", "prs": [
+                {"number": 12, "title": "...", "state": "open",
+                 "user": {"login": "..."}, "created_at": "...", "updated_at": "...",
+                 "html_url": "...", "reviews": ["<Copilot review body>", ...]}
+            ]}
+        ]
+    }
+
+Repositories are kept in processing order (busiest first) and only those with
+PRs in the report window are listed; PRs without Copilot reviews are kept with
+an empty reviews list. A dataset fetched for a wide window can be sliced into
+narrower ones with slice_dataset().
+
+"skipped" lists repositories that were skipped or only partly fetched. It
+holds DISCOVERY_SKIPPED when repository discovery itself stopped early, so
+repositories that were never listed may be missing; any non-empty "skipped"
+makes the report partial.
+"""
+
+import os
+from datetime import datetime, timezone
+
+from copilot_report.cache import load_json, save_json
+from copilot_report.windows import DEFAULT_WINDOW, WINDOWS, in_window, window_dates
+
+
+DATASET_VERSION = 2
+DATASET_FILE = 'dataset.json'
+
+# Entry in dataset['skipped'] recording that repository discovery did not finish
+DISCOVERY_SKIPPED = '<discovery>'
+
+
+def new_dataset(org, window=DEFAULT_WINDOW):
+    """Return an empty dataset for org and the named window, stamped with the current time."""
+    start, end = window_dates(window)
+    return {
+        'version': DATASET_VERSION,
+        'org': org,
+        'fetched_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'window': {'name': window, 'start': start, 'end': end},
+        'skipped': [],
+        'repos': [],
+    }
+
+
+def slice_dataset(dataset, window):
+    """Return the part of dataset covering a window no wider than the one it was fetched for.
+
+    The window ends on the same day as the dataset's, and PRs are selected by
+    their created_at date; repositories left without PRs are dropped.
+    """
+    if WINDOWS[window]['days'] > WINDOWS[dataset['window']['name']]['days']:
+        raise ValueError(f"Cannot build a {window} report from a {dataset['window']['name']} dataset; "
+                         f"fetch with --window {window}")
+    if window == dataset['window']['name']:
+        return dataset
+
+    start, end = window_dates(window, dataset['window']['end'])
+    repos = []
+    for repo in dataset['repos']:
+        prs = [pr for pr in repo['prs'] if in_window(pr['created_at'], start, end)]
+        if prs:
+            repos.append({'name': repo['name'], 'prs': prs})
+
+    return dict(dataset, window={'name': window, 'start': start, 'end': end}, repos=repos)
+
+
+def pr_record(pr, reviews):
+    """Keep only the PR fields the report uses, plus its Copilot review bodies."""
+    return {
+        'number': pr['number'],
+        'title': pr['title'],
+        'state': pr['state'],
+        'user': {'login': pr['user']['login']},
+        'created_at': pr['created_at'],
+        'updated_at': pr.get('updated_at'),
+        'html_url': pr['html_url'],
+        'reviews': reviews,
+    }
+
+
+def dataset_path(cache_dir):
+    return os.path.join(cache_dir, DATASET_FILE)
+
+
+def load_dataset(cache_dir):
+    """Load the dataset from the cache directory, or None if there is none."""
+    dataset = load_json(dataset_path(cache_dir))
+    if dataset is not None and dataset.get('version') != DATASET_VERSION:
+        print(f"Ignoring cached dataset with unsupported version {dataset.get('version')}")
+        return None
+    return dataset
+
+
+def save_dataset(cache_dir, dataset):
+    save_json(dataset_path(cache_dir), dataset)
@@ -0,0 +1,327 @@
+"""
+GitHub API access: repositories, pull requests in the report window and Copilot reviews.
+
+All requests go through github_get(), which applies the per-request timeout,
+the run deadline and, once load_http_cache() has been called, conditional
+requests with ETags cached across runs.
+"""
+
+import os
+import threading
+import time
+
+import requests
+
+from copilot_report.cache import load_json, save_json
+from copilot_report.windows import DEFAULT_WINDOW, in_window, window_dates
+
+
+COPILOT_LOGIN = 'copilot-pull-request-reviewer[bot]'
+
+# Most results the Search API returns for one query
+SEARCH_RESULT_LIMIT = 1000
+
+# Per-request timeout and overall time budget for talking to GitHub, in seconds.
+# When the budget runs out the remaining repositories are skipped and a partial
+# report is sent, so the job always finishes close to its scheduled slot.
+REQUEST_TIMEOUT = float(os.environ.get('REQUEST_TIMEOUT', '20'))
+RUN_DEADLINE_SECONDS = float(os.environ.get('RUN_DEADLINE_SECONDS', '1200'))
+
+# Monotonic time at which fetching must stop, set by start_deadline()
+deadline = None
+
+# url -> {'etag': ..., 'data': ...}, loaded by load_http_cache()
+http_cache = None
+_http_cache_used = set()
+_http_cache_lock = threading.Lock()
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the run's time budget for GitHub requests is used up."""
+
+
+class GitHubStatusError(requests.HTTPError):
+    """Raised when GitHub answers a request with a status other than 200.
+
+    A requests.RequestException, so callers that skip a repository on
+    network errors skip it on e.g. a 403 rate limit or a 502 as well.
+    """
+
+
+class SearchIncomplete(Exception):
+    """Raised when the Search API cannot return every PR in the window."""
+
+
+class CachedResponse:
+    """Stands in for a requests.Response when GitHub answers 304 Not Modified."""
+
+    status_code = 200
+
+    def __init__(self, data):
+        self._data = data
+        self.text = ''
+
+    def json(self):
+        return self._data
+
+
+def start_deadline(seconds=RUN_DEADLINE_SECONDS):
+    """Start the run's time budget."""
+    global deadline
+    deadline = time.monotonic() + seconds
+
+
+def load_http_cache(path):
+    """Enable conditional requests, using ETags stored at path by a previous run."""
+    global http_cache
+    http_cache = load_json(path, default={})
+
+
+def save_http_cache(path):
+    """Save the ETags of responses used in this run; entries not used are dropped."""
+    if http_cache is None:
+        return
+    with _http_cache_lock:
+        save_json(path, {key: http_cache[key] for key in _http_cache_used if key in http_cache})
+
+
+def get_github_headers():
+    """Get GitHub API headers with authentication."""
+    return {
+        'Authorization': f'token {os.environ["GH_TOKEN"]}',
+        'Accept': 'application/vnd.github+json'
+    }
+
+
+def github_get(url, params=None, **kwargs):
+    """GET a GitHub API URL with a timeout that never runs past the run deadline.
+
+    With the HTTP cache loaded, a stored ETag is sent as If-None-Match; a 304
+    answer (which does not count against the rate limit) returns the cached body.
+    """
+    timeout = REQUEST_TIMEOUT
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded()
+        timeout = min(timeout, remaining)
+
+    headers = get_github_headers()
+    cache_key = None
+    cached = None
+    if http_cache is not None:
+        cache_key = url + ('?' + '&'.join(f'{k}={v}' for k, v in sorted(params.items())) if params else '')
+        cached = http_cache.get(cache_key)
+        if cached:
+            headers['If-None-Match'] = cached['etag']
+
+    r = requests.get(url, headers=headers, params=params, timeout=timeout, **kwargs)
+
+    if cache_key is not None:
+        if r.status_code == 304 and cached:
+            with _http_cache_lock:
+                _http_cache_used.add(cache_key)
+            return CachedResponse(cached['data'])
+        etag = r.headers.get('ETag')
+        if r.status_code == 200 and etag:
+            with _http_cache_lock:
+                http_cache[cache_key] = {'etag': etag, 'data': r.json()}
+                _http_cache_used.add(cache_key)
+
+    return r
+
+
+def get_repos(org):
+    """Get all repositories from the organization, most recently pushed first.
+
+    Returns (repos, complete); complete is False when listing stopped early
+    on an error, a non-200 answer or the run deadline.
+    """
+    repos = []
+    page = 1
+    complete = True
+
+    while True:
+        url = f'https://api.github.com/orgs/{org}/repos?per_page=100&page={page}&sort=pushed&direction=desc'
+        try:
+            r = github_get(url)
+        except (DeadlineExceeded, requests.RequestException) as e:
+            print(f"Stopped listing repositories after {len(repos)}: {e!r}")
+            complete = False
+            break
+
+        if r.status_code != 200:
+            print(f"Stopped listing repositories after {len(repos)}: status {r.status_code}")
+            complete = False
+            break
+        if not r.json():
+            break
+
+        repos.extend(r.json())
+        page += 1
+
+    # Busiest repositories first, so they are covered even if the deadline hits
+    repos.sort(key=lambda repo: repo.get('pushed_at') or '', reverse=True)
+    return [repo['name'] for repo in repos], complete
+
+
+def get_pull_requests(org, repo, start=None, end=None):
+    """Get pull requests created between start and end (YYYY-MM-DD, default today and yesterday).
+
+    Pages through PRs newest first and stops at the first page reaching past start.
+    Raises GitHubStatusError on any non-200 answer.
+    """
+    if start is None or end is None:
+        start, end = window_dates(DEFAULT_WINDOW)
+
+    # Small pages for the daily window, where one page is almost always enough
+    daily_start, _ = window_dates(DEFAULT_WINDOW, end)
+    per_page = 20 if start >= daily_start else 100
+
+    url = f'https://api.github.com/repos/{org}/{repo}/pulls'
+    prs = []
+    page = 1
+
+    while True:
+        params = {
+            'state': 'all',
+            'sort': 'created',
+            'direction': 'desc',
+            'per_page': per_page,
+            'page': page
+        }
+        r = github_get(url, params=params)
+
+        # Treating an error as "no more PRs" would report the repo as complete
+        if r.status_code != 200:
+            raise GitHubStatusError(f"listing PRs of {repo} (page {page}): status {r.status_code}",
+                                    response=r)
+
+        page_prs = r.json()
+        prs.extend(page_prs)
+        if len(page_prs) < per_page or page_prs[-1]['created_at'][:10] < start:
+            break
+        page += 1
+
+    # Filter PRs created in the window
+    open_prs = [
+        pr for pr in prs
+        if in_window(pr['created_at'], start, end) and pr['state'] == 'open'
+    ]
+
+    closed_prs = [
+        pr for pr in prs
+        if in_window(pr['created_at'], start, end) and pr['state'] == 'closed'
+    ]
+
+    print(f"Repository {repo}: {len(open_prs)} open PRs, {len(closed_prs)} closed PRs")
+    return open_prs, closed_prs
+
+
+def search_pull_requests(org, start=None, end=None):
+    """Find PRs created between start and end (default today and yesterday) with the Search API.
+
+    Returns (prs_by_repo, complete): a dict of repository name -> (open PRs,
+    closed PRs), containing only repositories that actually have PRs in the
+    window, and whether the search ran to the end. The search items carry the
+    same number/title/state/user/created_at/html_url fields used below.
+
+    Raises SearchIncomplete when GitHub reports more matches than the Search
+    API returns (1000) or flags the results as incomplete.
+    """
+    if start is None or end is None:
+        start, end = window_dates(DEFAULT_WINDOW)
+
+    query = f"org:{org} is:pr created:{start}..{end}"
+    prs_by_repo = {}
+    page = 1
+    total = 0
+    complete = True
+
+    while True:
+        params = {
+            'q': query,
+            'sort': 'created',
+            'order': 'desc',
+            'per_page': 100,
+            'page': page
+        }
+        try:
+            r = github_get('https://api.github.com/search/issues', params=params)
+        except (DeadlineExceeded, requests.RequestException) as e:
+            print(f"Search stopped on page {page}: {e!r}")
+            complete = False
+            break
+
+        if r.status_code != 200:
+            print(f"Search failed with status {r.status_code}: {r.text[:200]}")
+            complete = False
+            break
+
+        data = r.json()
+        if data.get('incomplete_results'):
+            raise SearchIncomplete("GitHub search returned incomplete results")
+        # The Search API stops at 1000 results, i.e. 10 pages of 100.
+        if data.get('total_count', 0) > SEARCH_RESULT_LIMIT:
+            raise SearchIncomplete(f"{data['total_count']} PRs match, more than the "
+                                   f"{SEARCH_RESULT_LIMIT} the Search API returns")
+
+        items = data.get('items', [])
+        for pr in items:
+            repo = pr['repository_url'].rsplit('/', 1)[-1]
+            open_prs, closed_prs = prs_by_repo.setdefault(repo, ([], []))
+            if pr['state'] == 'open':
+                open_prs.append(pr)
+            elif pr['state'] == 'closed':
+                closed_prs.append(pr)
+
+        total += len(items)
+        if len(items) < 100 or total >= data.get('total_count', 0) or page * 100 >= SEARCH_RESULT_LIMIT:
+            break
+        page += 1
+
+    print(f"Search found {total} PRs in {len(prs_by_repo)} repositories ({page} request(s))")
+    for repo, (open_prs, closed_prs) in sorted(prs_by_repo.items()):
+        print(f"Repository {repo}: {len(open_prs)} open PRs, {len(closed_prs)} closed PRs")
+    return prs_by_repo, complete
+
+
+def discover_repos(org, start=None, end=None):
+    """List repositories to report on, busiest first, with their PRs if already known.
+
+    Returns (repos, prs_by_repo, complete). PR_DISCOVERY=search finds PRs
+    created between start and end with one org-wide search instead of listing
+    every repo; prs_by_repo is None otherwise, or when the search cannot
+    return every PR in the window and discovery falls back to listing repos.
+    complete is False when discovery stopped early, so repositories may be
+    missing from repos.
+    """
+    if os.environ.get('PR_DISCOVERY', 'repos') == 'search':
+        try:
+            prs_by_repo, complete = search_pull_requests(org, start, end)
+        except SearchIncomplete as e:
+            print(f"Search cannot cover the window ({e}); listing PRs per repository instead")
+            repos, complete = get_repos(org)
+            return repos, None, complete
+        # Search hits carry no pushed_at; the latest PR update is the activity signal
+        repos = sorted(prs_by_repo, reverse=True, key=lambda repo: max(
+            pr['updated_at'] for pr in prs_by_repo[repo][0] + prs_by_repo[repo][1]))
+        return repos, prs_by_repo, complete
+
+    repos, complete = get_repos(org)
+    return repos, None, complete
+
+
+def get_copilot_reviews(org, repo, pr_number):
+    """Get the raw bodies of Copilot reviews on a pull request; raises GitHubStatusError on non-200."""
+    comments_url = f'https://api.github.com/repos/{org}/{repo}/pulls/{pr_number}/reviews'
+
+    r = github_get(comments_url)
+
+    if r.status_code != 200:
+        raise GitHubStatusError(f"reviews of {repo}#{pr_number}: status {r.status_code}", response=r)
+
+    return [
+        comment['body'] for comment in r.json()
+        if comment['user']['login'] == COPILOT_LOGIN
+    ]
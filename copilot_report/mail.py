@@ -0,0 +1,188 @@
+"""
+Building and sending the report email.
+
+The report is never encoded in one piece: build_message() returns the MIME
+headers and the report side by side, and send_email() base64-encodes the
+report in chunks while writing it straight to the SMTP connection. Peak memory
+stays at the report itself plus one chunk, instead of the report, its encoded
+copy, as_string() and sendmail's own copies.
+
+SMTP_HOST, SMTP_PORT and SMTP_SSL=0 point the send at another server, e.g. a
+local stand-in started with `python -m aiosmtpd -n -l localhost:1025`.
+"""
+
+import binascii
+import os
+import time
+import uuid
+from collections import namedtuple
+from email.mime.multipart import MIMEMultipart
+from email.mime.nonmultipart import MIMENonMultipart
+
+
+RECIPIENTS = ['hlengoc.fpt@hillspire.com', 'enterprise-app-dev@hillspire.com']
+# RECIPIENTS = ['hlengoc.fpt@hillspire.com']
+
+SMTP_HOST = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', '465'))
+SMTP_SSL = os.environ.get('SMTP_SSL', '1') != '0'
+
+# Characters of the report encoded and sent per write to the SMTP socket
+SMTP_CHUNK_SIZE = int(os.environ.get('SMTP_CHUNK_SIZE', str(64 * 1024)))
+
+# Bytes of input per base64 line (76 characters once encoded)
+_BASE64_LINE = 57
+
+# An email built by build_message(): message is the multipart MIME skeleton,
+# whose HTML part has headers but no body, and html_content the report. Only
+# write_message() puts the two together; message.as_string() alone would send
+# an empty report.
+ReportMessage = namedtuple('ReportMessage', 'message html_content')
+
+
+def build_message(html_content, subject, recipients=RECIPIENTS):
+    """Create the multipart email carrying the HTML report, as a ReportMessage."""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = os.environ.get('GMAIL_USER', '')
+    msg['To'] = ', '.join(recipients)
+
+    # Create HTML part
+    html_part = MIMENonMultipart('text', 'html', charset='utf-8')
+    html_part['Content-Transfer-Encoding'] = 'base64'
+    msg.attach(html_part)
+    return ReportMessage(msg, html_content)
+
+
+def encode_base64_chunks(text, chunk_size=None):
+    """Yield text as UTF-8, base64-encoded in CRLF-terminated 76-character lines.
+
+    Encodes chunk_size (default SMTP_CHUNK_SIZE) characters at a time,
+    carrying bytes that do not fill a whole line over to the next chunk.
+    """
+    chunk_size = chunk_size or SMTP_CHUNK_SIZE
+    carry = b''
+    for start in range(0, len(text), chunk_size):
+        data = carry + text[start:start + chunk_size].encode('utf-8')
+        cut = len(data) - len(data) % _BASE64_LINE
+        data, carry = data[:cut], data[cut:]
+        if data:
+            yield b''.join(binascii.b2a_base64(data[i:i + _BASE64_LINE], newline=False) + b'\r\n'
+                           for i in range(0, len(data), _BASE64_LINE))
+    if carry:
+        yield binascii.b2a_base64(carry, newline=False) + b'\r\n'
+
+
+def write_message(report, fp, chunk_size=None):
+    """Write a ReportMessage to the binary file fp in SMTP wire format.
+
+    Headers and MIME boundaries come from a BytesGenerator with CRLF line
+    endings, folding and encoding headers as msg.as_string() always did; the
+    report body is streamed in between by encode_base64_chunks().
+    """
+    from email import policy
+    from email.generator import BytesGenerator
+    from io import BytesIO
+
+    # Flatten the message around a placeholder body, then split it there
+    msg = report.message
+    marker = f'report-body-{uuid.uuid4().hex}'
+    html_part = msg.get_payload(0)
+    html_part.set_payload(marker)
+    head = BytesIO()
+    try:
+        BytesGenerator(head, mangle_from_=False, maxheaderlen=0,
+                       policy=policy.compat32.clone(linesep='\r\n')).flatten(msg)
+    finally:
+        html_part.set_payload(None)
+    before, after = head.getvalue().split(marker.encode('ascii'), 1)
+
+    fp.write(before)
+    for chunk in encode_base64_chunks(report.html_content, chunk_size):
+        fp.write(chunk)
+    fp.write(after)
+
+
+class SMTPDataWriter:
+    """File-like object sending written bytes as the body of an SMTP DATA command.
+
+    Doubles periods at the start of lines, as smtplib.SMTP.data() does, and
+    counts what was sent.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.at_line_start = True
+        self.bytes_sent = 0
+        self.writes = 0
+
+    def write(self, data):
+        if not data:
+            return
+        data = data.replace(b'\n.', b'\n..')
+        if self.at_line_start and data.startswith(b'.'):
+            data = b'.' + data
+        self.at_line_start = data.endswith(b'\n')
+        self.server.send(data)
+        self.bytes_sent += len(data)
+        self.writes += 1
+
+
+def send_message_streamed(server, report, recipients):
+    """Send a ReportMessage over a connected smtplib server, streaming the DATA body.
+
+    Returns the SMTPDataWriter used, for its byte and write counts.
+    """
+    import smtplib
+
+    sender = report.message['From']
+    server.ehlo_or_helo_if_needed()
+    code, resp = server.mail(sender)
+    if code != 250:
+        raise smtplib.SMTPSenderRefused(code, resp, sender)
+    refused = {}
+    for recipient in recipients:
+        code, resp = server.rcpt(recipient)
+        if code not in (250, 251):
+            refused[recipient] = (code, resp)
+    if len(refused) == len(recipients):
+        server.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+
+    server.putcmd('data')
+    code, resp = server.getreply()
+    if code != 354:
+        raise smtplib.SMTPDataError(code, resp)
+
+    writer = SMTPDataWriter(server)
+    write_message(report, writer)
+    server.send(b'.\r\n' if writer.at_line_start else b'\r\n.\r\n')
+    code, resp = server.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, resp)
+    if refused:
+        print(f"Recipients refused: {', '.join(refused)}")
+    return writer
+
+
+def send_email(report, recipients=RECIPIENTS):
+    """Send a ReportMessage built by build_message() through Gmail (or SMTP_HOST)."""
+    # Only the send path needs smtplib, so dry runs never import it
+    import smtplib
+
+    try:
+        t0 = time.monotonic()
+        smtp_class = smtplib.SMTP_SSL if SMTP_SSL else smtplib.SMTP
+        with smtp_class(SMTP_HOST, SMTP_PORT, timeout=60) as server:
+            server.ehlo()
+            # Local stand-ins usually offer no AUTH; Gmail always does
+            if server.has_extn('auth'):
+                server.login(os.environ['GMAIL_USER'], os.environ['GMAIL_PASS'])
+            t_data = time.monotonic()
+            writer = send_message_streamed(server, report, recipients)
+            t_done = time.monotonic()
+        print("HTML email sent successfully!")
+        print(f"Sent {writer.bytes_sent} bytes in {writer.writes} writes: "
+              f"{t_done - t0:.2f}s total, {t_done - t_data:.2f}s sending the message")
+    except Exception as e:
+        print(f"Error sending email: {e}")
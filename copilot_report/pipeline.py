@@ -0,0 +1,302 @@
+"""
+Fetching the report dataset from GitHub, either as a pipeline of concurrent
+stages (run_report_pipeline) or sequentially (fetch_dataset).
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+
+from copilot_report.dataset import DISCOVERY_SKIPPED, new_dataset, pr_record
+from copilot_report.github import (
+    DeadlineExceeded, discover_repos, get_copilot_reviews, get_pull_requests,
+)
+from copilot_report.render import (
+    RENDER_BATCH_MIN_CHARS, RENDER_PROCESSES, format_comments, render_repo_prs, start_render_pool,
+)
+from copilot_report.windows import DEFAULT_WINDOW
+
+
+# Pipeline settings: bounded queue size between stages and number of review fetchers
+PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE', '16'))
+REVIEW_WORKERS = int(os.environ.get('REVIEW_WORKERS', '4'))
+
+# Marks the end of a stage's output on its queue
+_STAGE_DONE = object()
+
+
+class StageStats:
+    """Counters for one pipeline stage, shared by its worker threads."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.stall_in = 0.0   # seconds waiting for input
+        self.stall_out = 0.0  # seconds blocked on a full output queue
+        self.max_depth = 0    # deepest the output queue got
+        self.error = None
+        self.lock = threading.Lock()
+
+    def add(self, **deltas):
+        with self.lock:
+            for key, value in deltas.items():
+                setattr(self, key, getattr(self, key) + value)
+
+
+def _stage_put(stats, outbox, item):
+    """Put item on a bounded queue, recording stall time and queue depth."""
+    t0 = time.monotonic()
+    outbox.put(item)
+    depth = outbox.qsize()
+    with stats.lock:
+        stats.stall_out += time.monotonic() - t0
+        stats.max_depth = max(stats.max_depth, depth)
+
+
+def _run_stage(stats, inbox, outbox, handle, upstream=1, downstream=1):
+    """Worker loop: feed items from inbox to handle() and put its results on outbox.
+
+    inbox=None makes this a source stage that calls handle(None) once. The
+    loop ends after receiving one _STAGE_DONE per upstream worker and always
+    sends one _STAGE_DONE per downstream worker, even on errors, so the
+    pipeline cannot deadlock. After an error the stage keeps draining its
+    input so upstream stages are never blocked on a full queue.
+    """
+    try:
+        if inbox is None:
+            for result in handle(None):
+                _stage_put(stats, outbox, result)
+                stats.add(items=1)
+            return
+
+        done = 0
+        while done < upstream:
+            t0 = time.monotonic()
+            item = inbox.get()
+            stats.add(stall_in=time.monotonic() - t0)
+            if item is _STAGE_DONE:
+                done += 1
+                continue
+            if stats.error is not None:
+                continue
+            try:
+                for result in handle(item):
+                    _stage_put(stats, outbox, result)
+                stats.add(items=1)
+            except Exception as e:
+                stats.error = e
+                print(f"Pipeline stage {stats.name} failed: {e!r}")
+    except Exception as e:
+        stats.error = e
+        print(f"Pipeline stage {stats.name} failed: {e!r}")
+    finally:
+        for _ in range(downstream):
+            outbox.put(_STAGE_DONE)
+
+
+def run_report_pipeline(org, format_comment=None, window=DEFAULT_WINDOW):
+    """Fetch the dataset, and optionally render the report sections, with concurrent stages.
+
+    Stages run in their own threads, connected by bounded queues:
+    repo discovery -> PR listing -> review fetching (REVIEW_WORKERS threads)
+    -> rendering -> report assembly (this thread). Rendering one repository
+    overlaps with network waits for the next ones. The render stage formats
+    review bodies itself until RENDER_BATCH_MIN_CHARS characters have come
+    through, then hands each repository's bodies to a shared process pool,
+    so busy days are formatted on several cores while fetching continues;
+    assembly collects the results in order. Sections keep the discovery
+    order and match render.render_sections(dataset, format_comment); without
+    format_comment the sections are left empty and only the dataset is
+    fetched. Returns (dataset, open_prs_body, closed_prs_body, stage stats).
+    """
+    dataset = new_dataset(org, window)
+    start, end = dataset['window']['start'], dataset['window']['end']
+    skipped_set = set()
+    repo_order = []
+    discovery_complete = []
+
+    def skip(repo, reason):
+        print(f"Repository {repo}: skipped ({reason})")
+        skipped_set.add(repo)
+
+    def discover(_):
+        repos, prs_by_repo, complete = discover_repos(org, start, end)
+        discovery_complete.append(complete)
+        print(f"Processing {len(repos)} repositories for organization: {org}")
+        for index, repo in enumerate(repos):
+            repo_order.append(repo)
+            yield index, repo, prs_by_repo[repo] if prs_by_repo is not None else None
+
+    def list_prs(item):
+        index, repo, repo_prs = item
+        if repo_prs is None:
+            try:
+                repo_prs = get_pull_requests(org, repo, start, end)
+            except DeadlineExceeded:
+                skip(repo, "deadline reached")
+                return
+            except requests.RequestException as e:
+                skip(repo, f"request failed: {e!r}")
+                return
+        for pr_type, prs in (("open", repo_prs[0]), ("closed", repo_prs[1])):
+            if prs:
+                yield index, repo, pr_type, prs
+
+    def fetch_reviews(item):
+        index, repo, pr_type, prs = item
+        if repo in skipped_set:
+            return
+        try:
+            records = [pr_record(pr, get_copilot_reviews(org, repo, pr['number'])) for pr in prs]
+        except DeadlineExceeded:
+            skip(repo, "deadline reached")
+            return
+        except requests.RequestException as e:
+            skip(repo, f"request failed: {e!r}")
+            return
+        yield index, repo, pr_type, records
+
+    # Render stage state; the stage runs on a single thread
+    render_state = {'chars': 0, 'pool': None, 'pool_failed': False}
+
+    def render_stage(item):
+        index, repo, pr_type, records = item
+        bodies = list(dict.fromkeys(body for pr in records for body in pr['reviews'])) if format_comment else []
+        render_state['chars'] += sum(len(body) for body in bodies)
+
+        future = None
+        if (bodies and RENDER_PROCESSES > 1 and not render_state['pool_failed']
+                and render_state['chars'] >= RENDER_BATCH_MIN_CHARS):
+            try:
+                if render_state['pool'] is None:
+                    render_state['pool'] = start_render_pool()
+                future = render_state['pool'].submit(format_comments, bodies, format_comment)
+            except (OSError, RuntimeError) as e:
+                print(f"Process pool unavailable, rendering serially: {e!r}")
+                render_state['pool_failed'] = True
+        if future is None:
+            future = Future()
+            future.set_result(format_comments(bodies, format_comment))
+        yield index, repo, pr_type, records, bodies, future
+
+    stages = [
+        StageStats('discover'),
+        StageStats('list_prs'),
+        StageStats('fetch_reviews'),
+        StageStats('render'),
+    ]
+    queues = [queue.Queue(maxsize=PIPELINE_QUEUE_SIZE) for _ in stages]
+    workers = max(1, REVIEW_WORKERS)
+
+    threads = [
+        threading.Thread(target=_run_stage, args=(stages[0], None, queues[0], discover)),
+        threading.Thread(target=_run_stage, args=(stages[1], queues[0], queues[1], list_prs, 1, workers)),
+    ]
+    threads += [
+        threading.Thread(target=_run_stage, args=(stages[2], queues[1], queues[2], fetch_reviews, 1, 1))
+        for _ in range(workers)
+    ]
+    threads.append(threading.Thread(target=_run_stage, args=(stages[3], queues[2], queues[3], render_stage, workers, 1)))
+
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    # Report assembly: collect fetched PRs and formatted reviews, restore discovery order
+    assembly = StageStats('assemble')
+    records_by_repo = {}
+    pending = {"open": [], "closed": []}
+    try:
+        while True:
+            t0 = time.monotonic()
+            item = queues[3].get()
+            assembly.stall_in += time.monotonic() - t0
+            if item is _STAGE_DONE:
+                break
+            index, repo, pr_type, records, bodies, future = item
+            records_by_repo.setdefault((index, repo), {})[pr_type] = records
+            pending[pr_type].append((index, repo, records, bodies, future))
+            assembly.items += 1
+
+        for thread in threads:
+            thread.join()
+
+        sections = {"open": [], "closed": []}
+        if format_comment:
+            for pr_type, items in pending.items():
+                for index, repo, records, bodies, future in items:
+                    t0 = time.monotonic()
+                    try:
+                        formatted = future.result()
+                    except (OSError, RuntimeError) as e:
+                        # e.g. a worker died (BrokenProcessPool)
+                        print(f"Render worker failed for {repo}, rendering serially: {e!r}")
+                        formatted = format_comments(bodies, format_comment)
+                    assembly.stall_in += time.monotonic() - t0
+                    section = render_repo_prs(repo, records, pr_type, dict(zip(bodies, formatted)).__getitem__)
+                    sections[pr_type].append((index, repo, section))
+    finally:
+        if render_state['pool'] is not None:
+            render_state['pool'].shutdown(cancel_futures=True)
+    stages.append(assembly)
+
+    for stats in stages:
+        if stats.error is not None:
+            raise RuntimeError(f"pipeline stage {stats.name} failed") from stats.error
+
+    # Skipped repos may be incomplete (e.g. open PRs fetched, closed not), drop them
+    dataset['skipped'] = [repo for repo in repo_order if repo in skipped_set]
+    if discovery_complete != [True]:
+        dataset['skipped'].insert(0, DISCOVERY_SKIPPED)
+    for (index, repo), by_type in sorted(records_by_repo.items()):
+        if repo not in skipped_set:
+            dataset['repos'].append({'name': repo, 'prs': by_type.get('open', []) + by_type.get('closed', [])})
+
+    open_prs_body = ''.join(section for _, repo, section in sorted(sections["open"]) if repo not in skipped_set)
+    closed_prs_body = ''.join(section for _, repo, section in sorted(sections["closed"]) if repo not in skipped_set)
+
+    return dataset, open_prs_body, closed_prs_body, stages
+
+
+def print_pipeline_stats(stages):
+    """Print per-stage item counts, stall times and queue depth."""
+    print("Pipeline stages:")
+    for stats in stages:
+        print(f"  {stats.name:<14} items={stats.items:<5} stall_in={stats.stall_in:7.2f}s "
+              f"stall_out={stats.stall_out:7.2f}s max_queue_depth={stats.max_depth}")
+
+
+def fetch_dataset(org, window=DEFAULT_WINDOW):
+    """Fetch the dataset one repository and one request at a time."""
+    dataset = new_dataset(org, window)
+    start, end = dataset['window']['start'], dataset['window']['end']
+    repos, prs_by_repo, complete = discover_repos(org, start, end)
+    if not complete:
+        dataset['skipped'].append(DISCOVERY_SKIPPED)
+    print(f"Processing {len(repos)} repositories for organization: {org}")
+
+    for index, repo in enumerate(repos):
+        try:
+            if prs_by_repo is not None:
+                open_prs, closed_prs = prs_by_repo[repo]
+            else:
+                open_prs, closed_prs = get_pull_requests(org, repo, start, end)
+            records = [pr_record(pr, get_copilot_reviews(org, repo, pr['number']))
+                       for pr in open_prs + closed_prs]
+        except DeadlineExceeded:
+            print(f"Deadline reached, skipping {len(repos) - index} repositories")
+            dataset['skipped'].extend(repos[index:])
+            break
+        except requests.RequestException as e:
+            print(f"Repository {repo}: request failed, skipping: {e!r}")
+            dataset['skipped'].append(repo)
+            continue
+
+        if records:
+            dataset['repos'].append({'name': repo, 'prs': records})
+
+    return dataset
@@ -0,0 +1,440 @@
+"""
+Rendering of the Copilot review report as HTML email content.
+
+Works from the dataset written by the fetch step (see dataset.py), so the
+report can be re-rendered without talking to GitHub. Only cheap standard
+library modules are imported here, to keep dry runs fast.
+"""
+
+import html
+import os
+import re
+from datetime import datetime, timezone
+
+from copilot_report.dataset import DISCOVERY_SKIPPED
+from copilot_report.windows import DEFAULT_WINDOW, WINDOWS
+
+
+# Separates the open and closed PR sections in the combined report body
+CLOSED_SECTION_MARKER = 'LIST OF CLOSED PRs'
+
+# Batch rendering: worker processes (default: one per CPU) and the total size
+# of review bodies, in characters, below which they are rendered serially in
+# this process. Formatting costs about 0.2 us per character (0.65 ms for a
+# typical 3 KB review) and starting a pool of 2-4 workers and collecting the
+# results 20-60 ms, so a pool only pays off from a few hundred thousand
+# characters, i.e. more than about 130 typical reviews.
+RENDER_PROCESSES = int(os.environ.get('RENDER_PROCESSES', '0')) or os.cpu_count() or 1
+RENDER_BATCH_MIN_CHARS = int(os.environ.get('RENDER_BATCH_MIN_CHARS', '400000'))
+
+
+def format_copilot_comment_html(comment_text):
+    """Format Copilot comment text as HTML for email."""
+
+    # Escape HTML
+    html_text = html.escape(comment_text)
+    
+    # Basic formatting
+    html_text = re.sub(r'^## (.+)$', r'<h2 style="color: #0366d6; margin: 16px 0 12px 0; font-size: 18px;">\1</h2>', html_text, flags=re.MULTILINE)
+    html_text = re.sub(r'^### (.+)$', r'<h3 style="color: #0366d6; margin: 14px 0 10px 0; font-size: 16px;">\1</h3>', html_text, flags=re.MULTILINE)
+    
+    # Convert bullet points
+    html_text = re.sub(r'^- (.+)$', r'<li>\1</li>', html_text, flags=re.MULTILINE)
+    html_text = re.sub(r'(<li>.*?</li>(?:\s*<li>.*?</li>)*)', r'<ul style="margin: 12px 0; padding-left: 20px;">\1</ul>', html_text, flags=re.DOTALL)
+    
+    # Convert inline code
+    html_text = re.sub(r'`([^`]+)`', r'<code style="background: #f6f8fa; padding: 2px 4px; border-radius: 3px; font-family: monospace;">\1</code>', html_text)
+    
+    # Convert code blocks
+    html_text = re.sub(r'```([^`]+)```', 
+                      r'<pre style="background: #f6f8fa; border: 1px solid #e1e4e8; border-radius: 6px; padding: 12px; overflow-x: auto; font-family: monospace; margin: 12px 0;"><code>\1</code></pre>', 
+                      html_text, flags=re.DOTALL)
+    
+    # Convert line breaks
+    html_text = html_text.replace('\n\n', '</p><p>')
+    html_text = html_text.replace('\n', '')
+
+    html_text = html_text.replace(r'&lt;details&gt;', '')
+    html_text = html_text.replace(r'&lt;/details&gt;', '')
+    html_text = html_text.replace(r'&lt;summary&gt;', '')
+    html_text = html_text.replace(r'&lt;/summary&gt;', '')
+    
+    html_text = html_text.replace(r'| ---- | ----------- |', '')
+    html_text = html_text.replace(r'| File | Description |', '<table border="1" cellpadding="4" cellspacing="0"><tr><th> File </th><th> Descriptor </th></tr>')
+
+
+    char_to_find = "|"
+    indices = []
+
+    for i in range(len(html_text)):
+        if html_text[i] == char_to_find:
+            indices.append(i)
+    if indices and html_text.find("Show a summary per file") != -1:
+        indices = [x for x in indices if x > html_text.index("Show a summary per file")]
+        html_text = list(html_text)
+    else:
+        indices = []
+    
+    i = 0
+    while i < len(indices):
+        html_text[indices[i]] = '<tr><td>'
+        html_text[indices[i + 1]] = '</td><td>'
+        html_text[indices[i + 2]] = '</td></tr>'
+        i += 3
+    html_text = "".join(html_text)
+    return f'<div style="line-height: 1.5;"><p>{html_text}</p></div>'
+
+
+def format_copilot_comment_html_plain(comment_text):
+    """Format Copilot comment text as HTML for email, keeping line breaks and tables as text."""
+
+    # Escape HTML
+    html_text = html.escape(comment_text)
+    
+    # Basic formatting
+    html_text = re.sub(r'^## (.+)$', r'<h2 style="color: #0366d6; margin: 16px 0 12px 0; font-size: 18px;">\1</h2>', html_text, flags=re.MULTILINE)
+    html_text = re.sub(r'^### (.+)$', r'<h3 style="color: #0366d6; margin: 14px 0 10px 0; font-size: 16px;">\1</h3>', html_text, flags=re.MULTILINE)
+    
+    # Convert bullet points
+    html_text = re.sub(r'^- (.+)$', r'<li>\1</li>', html_text, flags=re.MULTILINE)
+    html_text = re.sub(r'(<li>.*?</li>(?:\s*<li>.*?</li>)*)', r'<ul style="margin: 12px 0; padding-left: 20px;">\1</ul>', html_text, flags=re.DOTALL)
+    
+    # Convert inline code
+    html_text = re.sub(r'`([^`]+)`', r'<code style="background: #f6f8fa; padding: 2px 4px; border-radius: 3px; font-family: monospace;">\1</code>', html_text)
+    
+    # Convert code blocks
+    html_text = re.sub(r'```([^`]+)```', 
+                      r'<pre style="background: #f6f8fa; border: 1px solid #e1e4e8; border-radius: 6px; padding: 12px; overflow-x: auto; font-family: monospace; margin: 12px 0;"><code>\1</code></pre>', 
+                      html_text, flags=re.DOTALL)
+    
+    # Convert line breaks
+    html_text = html_text.replace('\n\n', '</p><p>')
+    html_text = html_text.replace('\n', '<br>')
+
+    html_text = html_text.replace(r'&lt;details&gt;', '')
+    html_text = html_text.replace(r'&lt;/details&gt;', '')
+    html_text = html_text.replace(r'&lt;summary&gt;', '')
+    html_text = html_text.replace(r'&lt;/summary&gt;', '')
+    return f'<div style="line-height: 1.5;"><p>{html_text}</p></div>'
+
+
+def render_copilot_comments(review_bodies, format_comment=format_copilot_comment_html):
+    """Render Copilot review bodies as the HTML block shown for one PR."""
+    list_comments = ''
+    for body in review_bodies:
+        formatted_comment = format_comment(body)
+        list_comments += f'<div style="margin-bottom: 20px; padding: 15px; background: #f8f9fa; border-left: 4px solid white; border-radius: 4px;"><strong style="color: #0366d6;">🤖 Copilot Review:</strong><br>{formatted_comment}</div>'
+    return list_comments
+
+
+def render_repo_section(repo, repo_prs_with_comments):
+    """Render the HTML table for one repository's PRs and their rendered Copilot comments."""
+    # Generate HTML for this repository
+    section = f"""
+        <div style="margin-bottom: 40px;">
+            <h2 style="color: #0366d6; border-bottom: 2px solid #e1e4e8; padding-bottom: 10px;">
+                📁 Repository: {repo}
+            </h2>
+            <table style="width: 100%; border-collapse: collapse; margin-top: 20px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                <thead>
+                    <tr style="background-color: #f6f8fa;">
+                        <th style="border: 1px solid #d0d7de; padding: 12px; text-align: left; font-weight: 600;">Pull Request</th>
+                        <th style="border: 1px solid #d0d7de; padding: 12px; text-align: left; font-weight: 600;">Copilot Review Comments</th>
+                    </tr>
+                </thead>
+                <tbody>
+        """
+
+    for item in repo_prs_with_comments:
+        pr = item['pr']
+        comments = item['comments']
+
+        # Format comments for HTML
+        formatted_comments = comments.replace('\n', '<br>')
+        formatted_comments = formatted_comments.replace('------- Review by copilot:', '<strong>🤖 Copilot Review:</strong>')
+
+        section += f"""
+                    <tr style="border-bottom: 1px solid #e1e4e8;">
+                        <td style="border: 1px solid #d0d7de; padding: 12px; vertical-align: top; width: 30%;">
+                            <div style="margin-bottom: 8px;">
+                                <strong>#{pr['number']}: {pr['title']}</strong>
+                            </div>
+                            <div style="margin-bottom: 8px;">
+                                <span style="background-color: #{'28a745' if pr['state'] == 'open' else '#6f42c1'}; color: white; padding: 2px 8px; border-radius: 12px; font-size: 12px;">
+                                    {pr['state'].upper()}
+                                </span>
+                            </div>
+                            <div style="margin-bottom: 8px;">
+                                <strong>Author:</strong> {pr['user']['login']}
+                            </div>
+                            <div style="margin-bottom: 8px;">
+                                <strong>Created:</strong> {pr['created_at'][:10]}
+                            </div>
+                            <div>
+                                <a href="{pr['html_url']}" style="color: #0366d6; text-decoration: none;">
+                                    🔗 View PR
+                                </a>
+                            </div>
+                        </td>
+                        <td style="border: 1px solid #d0d7de; padding: 12px; vertical-align: top;">
+                            <div style="background-color: #f8f9fa; padding: 12px; border-radius: 6px; border-left: 4px solid #0366d6;">
+                                {formatted_comments}
+                            </div>
+                        </td>
+                    </tr>
+            """
+
+    section += """
+                </tbody>
+            </table>
+        </div>
+        """
+
+    return section
+
+
+def render_repo_prs(repo, prs, pr_type, format_comment=format_copilot_comment_html):
+    """Render the section for a repository's PRs of one state that have Copilot reviews.
+
+    prs are dataset PR records (with a 'reviews' list). Returns '' when none of
+    them has a Copilot review. format_comment turns one review body into HTML.
+    """
+    repo_prs_with_comments = [
+        {'pr': pr, 'comments': render_copilot_comments(pr['reviews'], format_comment)}
+        for pr in prs
+        if pr['state'] == pr_type and pr['reviews']
+    ]
+    if not repo_prs_with_comments:
+        return ''
+    return render_repo_section(repo, repo_prs_with_comments)
+
+
+def format_comments(review_bodies, format_comment=format_copilot_comment_html):
+    """Format review bodies one by one; the unit of work sent to a render worker."""
+    return [format_comment(body) for body in review_bodies]
+
+
+def start_render_pool(processes=None):
+    """Start a process pool for format_comments() that is safe to use from threads.
+
+    Worker processes come from a fork server (or are spawned) rather than
+    forked from this process, whose other threads may hold locks.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=processes or RENDER_PROCESSES,
+                               mp_context=multiprocessing.get_context(method))
+
+
+def render_comments_batch(review_bodies, format_comment=format_copilot_comment_html,
+                          processes=None, min_chars=None):
+    """Format many review bodies, in a process pool for large batches.
+
+    Returns the formatted HTML in the same order as review_bodies. Bodies are
+    sent to the workers in chunks of several bodies each, which keeps the
+    pickling round trips to a handful per worker. Batches of fewer than
+    min_chars characters in total (RENDER_BATCH_MIN_CHARS), or a single
+    process, are rendered serially; so is everything if the pool cannot be
+    started. format_comment must be a module-level function so it can be
+    pickled.
+    """
+    processes = processes or RENDER_PROCESSES
+    min_chars = RENDER_BATCH_MIN_CHARS if min_chars is None else min_chars
+
+    if (processes <= 1 or len(review_bodies) < 2
+            or sum(len(body) for body in review_bodies) < min_chars):
+        return format_comments(review_bodies, format_comment)
+
+    # Imported here: only large batches need it
+    from concurrent.futures import ProcessPoolExecutor
+
+    processes = min(processes, len(review_bodies))
+    # About four chunks per worker balances uneven body sizes against IPC overhead
+    chunksize = max(1, -(-len(review_bodies) // (processes * 4)))
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            return list(pool.map(format_comment, review_bodies, chunksize=chunksize))
+    except (OSError, RuntimeError) as e:
+        # e.g. no /dev/shm for the pool's semaphores, or a worker died (BrokenProcessPool)
+        print(f"Process pool unavailable, rendering serially: {e!r}")
+        return format_comments(review_bodies, format_comment)
+
+
+def render_sections(dataset, format_comment=format_copilot_comment_html):
+    """Render the open and closed PR sections of a dataset, in repository order.
+
+    All review bodies are formatted up front with render_comments_batch()
+    (identical bodies once), then laid out exactly as rendering them one by
+    one would.
+    """
+    bodies = list(dict.fromkeys(
+        body for repo in dataset['repos'] for pr in repo['prs'] for body in pr['reviews']))
+    formatted = dict(zip(bodies, render_comments_batch(bodies, format_comment)))
+    format_comment = formatted.__getitem__
+
+    open_prs_body = ''
+    closed_prs_body = ''
+    for repo in dataset['repos']:
+        open_prs_body += render_repo_prs(repo['name'], repo['prs'], 'open', format_comment)
+    for repo in dataset['repos']:
+        closed_prs_body += render_repo_prs(repo['name'], repo['prs'], 'closed', format_comment)
+    return open_prs_body, closed_prs_body
+
+
+def combine_sections(open_prs_body, closed_prs_body, window=DEFAULT_WINDOW):
+    """Combine both sections into the report body that build_report_html() expects."""
+    if not open_prs_body and not closed_prs_body:
+        print("No PRs with Copilot reviews found.")
+        return f'<div class="no-data">No pull requests with Copilot reviews found for {WINDOWS[window]["period"]}.</div>'
+
+    print("Found PRs with Copilot reviews.")
+    return open_prs_body + CLOSED_SECTION_MARKER + closed_prs_body
+
+
+def describe_skipped(skipped):
+    """Explain what a partial report is missing, from dataset['skipped'] ('' if nothing)."""
+    skipped = skipped or []
+    repos = [repo for repo in skipped if repo != DISCOVERY_SKIPPED]
+    parts = []
+    if len(repos) < len(skipped):
+        parts.append('repository discovery did not finish, so repositories with PRs '
+                     'in the window may be missing')
+    if repos:
+        parts.append(f"{len(repos)} repositories were skipped or only partly checked: {', '.join(repos)}")
+    return '; '.join(parts)
+
+
+def report_subject(skipped=None, window=DEFAULT_WINDOW):
+    """Subject line of the report email."""
+    today_str = datetime.now(timezone.utc).date().strftime('%Y-%m-%d')
+    return '📊 {} Report for Copilot Reviews in Hillspire Repositories - {}{}'.format(
+        WINDOWS[window]['title'], today_str, ' (partial)' if skipped else '')
+
+
+def build_report_html(html_body, skipped=None, window=DEFAULT_WINDOW):
+    """Wrap the report body in the complete HTML email document."""
+    title = WINDOWS[window]['title']
+    period = WINDOWS[window]['period']
+    description = WINDOWS[window]['description']
+
+    partial_notice = ''
+    if skipped:
+        partial_notice = f"""
+        <div class="partial-notice">
+            <strong>⚠️ Partial report:</strong> the run's time budget ran out or requests failed,
+            so {html.escape(describe_skipped(skipped))}
+        </div>
+        """
+
+    # Create the complete HTML email
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>{title} Copilot Report</title>
+        <style>
+            body {{
+                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif;
+                line-height: 1.6;
+                color: #24292e;
+                max-width: 1200px;
+                margin: 0 auto;
+                padding: 20px;
+                background-color: #ffffff;
+            }}
+            .header {{
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 30px;
+                border-radius: 10px;
+                text-align: center;
+                margin-bottom: 30px;
+                box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+            }}
+            .header h1 {{
+                margin: 0;
+                font-size: 28px;
+                font-weight: 600;
+            }}
+            .header p {{
+                margin: 10px 0 0 0;
+                opacity: 0.9;
+                font-size: 16px;
+            }}
+            .section-title {{
+                background-color: #f6f8fa;
+                padding: 20px;
+                border-radius: 8px;
+                border-left: 4px solid #0366d6;
+                margin: 30px 0 20px 0;
+            }}
+            .section-title h2 {{
+                margin: 0;
+                color: #0366d6;
+                font-size: 24px;
+            }}
+            .no-data {{
+                text-align: center;
+                padding: 40px;
+                color: #586069;
+                font-style: italic;
+                background-color: #f8f9fa;
+                border-radius: 8px;
+                margin: 20px 0;
+            }}
+            .partial-notice {{
+                background-color: #fff8c5;
+                border: 1px solid #d4a72c;
+                border-radius: 8px;
+                padding: 16px 20px;
+                margin: 20px 0;
+                color: #24292e;
+            }}
+            .footer {{
+                margin-top: 40px;
+                padding: 20px;
+                text-align: center;
+                color: #586069;
+                font-size: 14px;
+                border-top: 1px solid #e1e4e8;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>🤖 {title} Copilot Review Report</h1>
+            <p>Hillspire Repositories • {datetime.now(timezone.utc).strftime('%B %d, %Y')}</p>
+        </div>
+        {partial_notice}
+
+        <div class="section-title">
+            <h2>🟢 Open Pull Requests with Copilot Reviews</h2>
+        </div>
+        {html_body.split(CLOSED_SECTION_MARKER)[0] if CLOSED_SECTION_MARKER in html_body else html_body}
+
+        <div class="section-title">
+            <h2>🔴 Closed Pull Requests with Copilot Reviews</h2>
+        </div>
+        {html_body.split(CLOSED_SECTION_MARKER)[1] if CLOSED_SECTION_MARKER in html_body else f'<div class="no-data">No closed PRs with Copilot reviews found for {period}.</div>'}
+
+        <div class="footer">
+            <p>Generated automatically by GitHub Actions • Hillspire DevOps Team</p>
+            <p>📧 This report includes PRs created {description} with Copilot review comments</p>
+        </div>
+    </body>
+    </html>
+    """
+
+    return html_content
+
+
+def render_report(dataset, format_comment=format_copilot_comment_html):
+    """Render a dataset as the complete HTML email document for its window."""
+    window = dataset['window']['name']
+    open_prs_body, closed_prs_body = render_sections(dataset, format_comment)
+    html_body = combine_sections(open_prs_body, closed_prs_body, window)
+    return build_report_html(html_body, dataset.get('skipped'), window)
@@ -0,0 +1,137 @@
+"""
+Output renderers for the fetched dataset.
+
+Every renderer turns one dataset (see dataset.py) into one document, so any
+number of formats can be produced from a single crawl. Renderers register
+themselves by name with register_renderer():
+
+    table     HTML email, file summaries rendered as tables (the daily email)
+    email     HTML email, review text kept close to the original markdown
+    markdown  Markdown digest with the review bodies quoted
+    json      JSON summary: counts per repository and PR, no review bodies
+
+Renderers with email=True produce the HTML document that send/run mail out;
+their format_comment is also used by the fetch pipeline to render while
+fetching.
+"""
+
+import json
+from collections import namedtuple
+
+from copilot_report.render import (
+    describe_skipped, format_copilot_comment_html, format_copilot_comment_html_plain, render_report,
+)
+from copilot_report.windows import WINDOWS
+
+
+Renderer = namedtuple('Renderer', 'name extension render email format_comment')
+
+RENDERERS = {}
+
+
+def register_renderer(name, extension, email=False, format_comment=None):
+    """Decorator registering func(dataset) -> str as the renderer called name."""
+    def decorator(func):
+        RENDERERS[name] = Renderer(name, extension, func, email, format_comment)
+        return func
+    return decorator
+
+
+def get_renderer(name):
+    try:
+        return RENDERERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown report format {name!r}, expected one of {', '.join(RENDERERS)}")
+
+
+@register_renderer('table', 'html', email=True, format_comment=format_copilot_comment_html)
+def render_table(dataset):
+    return render_report(dataset, format_copilot_comment_html)
+
+
+@register_renderer('email', 'html', email=True, format_comment=format_copilot_comment_html_plain)
+def render_email(dataset):
+    return render_report(dataset, format_copilot_comment_html_plain)
+
+
+@register_renderer('markdown', 'md')
+def render_markdown(dataset):
+    lines = [
+        f"# {WINDOWS[dataset['window']['name']]['title']} Copilot review report for {dataset['org']}",
+        '',
+        f"Fetched {dataset['fetched_at']}, PRs created {WINDOWS[dataset['window']['name']]['description']} "
+        f"({dataset['window']['start']} to {dataset['window']['end']}).",
+        '',
+    ]
+    if dataset['skipped']:
+        lines += [
+            f"> **Partial report:** {describe_skipped(dataset['skipped'])}",
+            '',
+        ]
+
+    for pr_type, title in (('open', 'Open pull requests'), ('closed', 'Closed pull requests')):
+        lines += [f'## {title}', '']
+        found = False
+        for repo in dataset['repos']:
+            prs = [pr for pr in repo['prs'] if pr['state'] == pr_type and pr['reviews']]
+            if not prs:
+                continue
+            found = True
+            lines += [f"### {repo['name']}", '']
+            for pr in prs:
+                lines += [
+                    f"#### [#{pr['number']}: {pr['title']}]({pr['html_url']})",
+                    '',
+                    f"Author: @{pr['user']['login']}, created {pr['created_at'][:10]}",
+                    '',
+                ]
+                for body in pr['reviews']:
+                    lines += ['> ' + line if line else '>' for line in body.splitlines()]
+                    lines.append('')
+        if not found:
+            lines += ['_No pull requests with Copilot reviews._', '']
+
+    return '\n'.join(lines)
+
+
+@register_renderer('json', 'json')
+def render_json_summary(dataset):
+    repos = []
+    for repo in dataset['repos']:
+        prs = [
+            {
+                'number': pr['number'],
+                'title': pr['title'],
+                'state': pr['state'],
+                'author': pr['user']['login'],
+                'created_at': pr['created_at'],
+                'html_url': pr['html_url'],
+                'copilot_reviews': len(pr['reviews']),
+            }
+            for pr in repo['prs']
+        ]
+        repos.append({
+            'name': repo['name'],
+            'prs': len(prs),
+            'prs_with_copilot_reviews': sum(1 for pr in prs if pr['copilot_reviews']),
+            'copilot_reviews': sum(pr['copilot_reviews'] for pr in prs),
+            'pull_requests': prs,
+        })
+
+    summary = {
+        'org': dataset['org'],
+        'fetched_at': dataset['fetched_at'],
+        'window': dataset['window'],
+        'partial': bool(dataset['skipped']),
+        'skipped': dataset['skipped'],
+        'totals': {
+            'repos': len(repos),
+            'prs': sum(repo['prs'] for repo in repos),
+            'open_prs': sum(1 for repo in repos for pr in repo['pull_requests'] if pr['state'] == 'open'),
+            'closed_prs': sum(1 for repo in repos for pr in repo['pull_requests'] if pr['state'] == 'closed'),
+            'prs_with_copilot_reviews': sum(repo['prs_with_copilot_reviews'] for repo in repos),
+            'copilot_reviews': sum(repo['copilot_reviews'] for repo in repos),
+        },
+        'repos': repos,
+    }
+    return json.dumps(summary, indent=2) + '\n'
@@ -0,0 +1,49 @@
+"""
+Report windows: which PRs, by creation date, a report covers.
+
+A window is named and ends on the report day (UTC), inclusive:
+
+    daily    today and yesterday (the original report)
+    weekly   the last 7 days
+    monthly  the last 30 days
+
+One fetch for the widest window requested can be sliced into the narrower
+ones in memory (see dataset.slice_dataset), so extra digests cost no extra
+crawling.
+"""
+
+from datetime import date, datetime, timezone, timedelta
+
+
+# name -> days covered, title used in the email, period used in "found for ...",
+# and description used in "PRs created ..."
+WINDOWS = {
+    'daily': {'days': 2, 'title': 'Daily', 'period': 'today/yesterday',
+              'description': 'today and yesterday'},
+    'weekly': {'days': 7, 'title': 'Weekly', 'period': 'the last 7 days',
+               'description': 'in the last 7 days'},
+    'monthly': {'days': 30, 'title': 'Monthly', 'period': 'the last 30 days',
+                'description': 'in the last 30 days'},
+}
+
+DEFAULT_WINDOW = 'daily'
+
+
+def window_dates(name, end=None):
+    """Return (start, end) as YYYY-MM-DD strings for the named window ending on end (default today)."""
+    if end is None:
+        end = datetime.now(timezone.utc).date()
+    elif isinstance(end, str):
+        end = date.fromisoformat(end)
+    start = end - timedelta(days=WINDOWS[name]['days'] - 1)
+    return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+
+def widest_window(names):
+    """Return the name of the window covering the most days."""
+    return max(names, key=lambda name: WINDOWS[name]['days'])
+
+
+def in_window(created_at, start, end):
+    """Whether an ISO timestamp falls on a day between start and end, inclusive."""
+    return start <= created_at[:10] <= end
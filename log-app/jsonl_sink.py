@@ -0,0 +1,195 @@
+"""
+Local newline-delimited JSON sink for the structured events written by log.py.
+
+JsonlSink exposes the same log_struct(info, severity=...) method as a Cloud
+Logging logger, so it can stand in for one in the load generator.
+Each line mirrors the Cloud Logging export shape:
+
+    {"severity":"INFO","jsonPayload":{"header":{...},"payload":{...}}}
+
+Events in the fixed ims_access header/payload schema are serialized by a
+specialized encoder that skips generic dict walking; anything else falls back
+to a preconfigured json.JSONEncoder. The active file is rotated by size or age
+and rotated segments are gzipped on a background thread, off the write path.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from json.encoder import encode_basestring_ascii as _str
+
+
+# Built once and reused: compact separators, ASCII output so byte length == char length.
+_generic_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=True)
+_encode_generic = _generic_encoder.encode
+
+
+def _encode_roles(roles):
+    # Only a real list encodes like json does; a string would be split into characters
+    if type(roles) is not list:
+        raise TypeError("roles must be a list")
+    return "[" + ",".join([_str(role) for role in roles]) + "]"
+
+
+def _encode_ims_access_event(event):
+    """Encode an event in the fixed header/payload schema.
+
+    Raises KeyError, TypeError or ValueError if the event does not match the
+    schema exactly; the caller then falls back to the generic encoder.
+    """
+    header = event["header"]
+    payload = event["payload"]
+    user = header["user"]
+    metadata = header["metadata"]
+    access = payload["ims_access"]
+
+    if (len(event) != 2 or len(header) != 4 or len(user) != 5 or len(metadata) != 3
+            or len(payload) != 1 or len(access) != 7):
+        raise ValueError("event does not match the ims_access schema")
+
+    status_code = access["status_code"]
+    response_time_ms = access["response_time_ms"]
+    if type(status_code) is not int or type(response_time_ms) is not int:
+        raise TypeError("status_code and response_time_ms must be int")
+
+    return "".join((
+        '{"header":{"event_id":', _str(header["event_id"]),
+        ',"timestamp":', _str(header["timestamp"]),
+        ',"user":{"user_id":', _str(user["user_id"]),
+        ',"email":', _str(user["email"]),
+        ',"roles":', _encode_roles(user["roles"]),
+        ',"ip_address":', _str(user["ip_address"]),
+        ',"session_id":', _str(user["session_id"]),
+        '},"metadata":{"source_system":', _str(metadata["source_system"]),
+        ',"app_version":', _str(metadata["app_version"]),
+        ',"env":', _str(metadata["env"]),
+        '}},"payload":{"ims_access":{"type":', _str(access["type"]),
+        ',"endpoint":', _str(access["endpoint"]),
+        ',"method":', _str(access["method"]),
+        ',"query_params":', _encode_generic(access["query_params"]),
+        ',"status_code":', str(status_code),
+        ',"response_time_ms":', str(response_time_ms),
+        ',"referrer":', _str(access["referrer"]),
+        '}}}',
+    ))
+
+
+def encode_event(info):
+    """Serialize an event to compact JSON, using the fast path when possible."""
+    try:
+        return _encode_ims_access_event(info)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return _encode_generic(info)
+
+
+def encode_line(info, severity="INFO"):
+    """Serialize one log line, including the trailing newline."""
+    return '{"severity":' + _str(severity or "DEFAULT") + ',"jsonPayload":' + encode_event(info) + "}\n"
+
+
+class JsonlSink:
+    """Buffered JSONL writer with size/time rotation and gzip of rotated segments.
+
+    path: active file, e.g. logs/ims-access.jsonl. Rotated segments are
+        written next to it as ims-access.<UTC timestamp>.<n>.jsonl.gz.
+    max_bytes: rotate once the active file reaches this size (0 disables).
+    max_age_s: rotate once the active file is this old (0 disables).
+    buffer_size: size of the write buffer in bytes.
+    compress: gzip rotated segments (the active file is never compressed).
+        Compression runs on one background thread; rotated lists the .gz
+        names as soon as a segment is rotated, and close() waits until every
+        segment has been compressed.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, max_age_s=3600,
+                 buffer_size=256 * 1024, compress=True):
+        self.name = path
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.buffer_size = buffer_size
+        self.compress = compress
+        self.rotated = []
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._stem, self._ext = os.path.splitext(path)
+        self._seq = 0
+        self._file = None
+        self._compressor = None
+        self._pending = []
+        self._open()
+
+    def _open(self):
+        self._file = open(self.name, "ab", buffering=self.buffer_size)
+        self._size = self._file.tell()
+        self._opened_at = time.monotonic()
+
+    def log_struct(self, info, severity=None):
+        """Write one structured event, rotating first if the segment is full or too old."""
+        if self._file is None:
+            raise ValueError("log_struct() on a closed JsonlSink")
+
+        if ((self.max_bytes and self._size >= self.max_bytes) or
+                (self.max_age_s and time.monotonic() - self._opened_at >= self.max_age_s)):
+            self.rotate()
+
+        line = encode_line(info, severity).encode("ascii")
+        self._file.write(line)
+        self._size += len(line)
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def rotate(self):
+        """Close the active segment, move it aside (gzipped) and start a new one."""
+        self._file.close()
+        self._file = None
+
+        if self._size:
+            self._seq += 1
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            segment = "{}.{}.{}{}".format(self._stem, stamp, self._seq, self._ext)
+            os.replace(self.name, segment)
+            if self.compress:
+                if self._compressor is None:
+                    self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jsonl-gzip")
+                # Surface errors of finished compressions without waiting for the others
+                for future in [f for f in self._pending if f.done()]:
+                    self._pending.remove(future)
+                    future.result()
+                self._pending.append(self._compressor.submit(self._gzip, segment))
+                segment += ".gz"
+            self.rotated.append(segment)
+
+        self._open()
+
+    @staticmethod
+    def _gzip(segment):
+        target = segment + ".gz"
+        with open(segment, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.remove(segment)
+        return target
+
+    def close(self):
+        """Close the active segment and wait for rotated segments to be compressed."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._compressor is not None:
+            self._compressor.shutdown(wait=True)
+            self._compressor = None
+            pending, self._pending = self._pending, []
+            for future in pending:
+                future.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,276 @@
+"""
+Load generator for the IMS access-log events written by log.py.
+
+Builds realistic variants of the ims_access header/payload event (users,
+endpoints, status codes, response times), drives a logger at a target rate
+against a local sink, and reports throughput, latency percentiles and
+CPU/memory cost per thousand events.
+
+Usage:
+    python load_gen.py --events 50000 --rate 5000
+    python load_gen.py --events 20000 --rate 0 --output /tmp/ims.jsonl
+    python load_gen.py --events 200000 --rate 0 --sink jsonl --output logs/ims.jsonl
+    python load_gen.py --events 200000 --rate 0 --sink jsonl --output logs/ims.jsonl --rollup
+"""
+
+import argparse
+import json
+import random
+import resource
+import time
+import tracemalloc
+from datetime import datetime, timezone, timedelta
+
+from jsonl_sink import JsonlSink
+from log import build_ims_access_event
+from rollup import RollupSink
+
+
+USERS = [
+    ("user-12345", "john.doe@hillspire.com", ["Viewer"]),
+    ("user-23456", "jane.smith@hillspire.com", ["Analyst"]),
+    ("user-34567", "li.wei@hillspire.com", ["Viewer", "Analyst"]),
+    ("user-45678", "maria.garcia@hillspire.com", ["Admin"]),
+    ("user-56789", "sam.taylor@hillspire.com", ["Viewer"]),
+    ("user-67890", "ngoc.le@hillspire.com", ["Analyst", "Approver"]),
+]
+
+# (endpoint, method, referrer, query param name, typical response time in ms)
+ENDPOINTS = [
+    ("/api/investments/holding-summary", "GET", "/dashboard", "investmentId", 120),
+    ("/api/investments/transactions", "GET", "/investments", "investmentId", 250),
+    ("/api/portfolios/overview", "GET", "/dashboard", "portfolioId", 180),
+    ("/api/portfolios/rebalance", "POST", "/portfolios", "portfolioId", 650),
+    ("/api/reports/export", "POST", "/reports", "reportId", 1400),
+    ("/api/users/preferences", "PUT", "/settings", "userId", 90),
+]
+
+# Mostly successes, with the long tail of client and server errors seen in production.
+STATUS_CODES = [200, 201, 204, 304, 400, 401, 403, 404, 429, 500, 502, 503]
+STATUS_WEIGHTS = [880, 25, 15, 20, 12, 8, 5, 15, 5, 8, 4, 3]
+
+
+class NullSink:
+    """Local sink that discards events, to measure event generation alone."""
+
+    name = "null"
+
+    def log_struct(self, info, severity=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """Local sink writing one JSON document per line with json.dumps.
+
+    Kept as the generic-serialization baseline to compare JsonlSink against.
+    """
+
+    def __init__(self, path):
+        self.name = path
+        self._file = open(path, "w", encoding="utf-8")
+
+    def log_struct(self, info, severity=None):
+        self._file.write(json.dumps(info) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class EventGenerator:
+    """Generate variants of the ims_access event from a seeded RNG."""
+
+    def __init__(self, seed=None, start=None):
+        self._rng = random.Random(seed)
+        self._start = start or datetime.now(timezone.utc)
+        self._count = 0
+
+    def next_event(self):
+        rng = self._rng
+        self._count += 1
+
+        user_id, email, roles = rng.choice(USERS)
+        endpoint, method, referrer, param, typical_ms = rng.choice(ENDPOINTS)
+        status_code = rng.choices(STATUS_CODES, weights=STATUS_WEIGHTS)[0]
+
+        # Log-normal around the endpoint's typical latency gives a realistic long tail.
+        response_time_ms = int(rng.lognormvariate(0, 0.5) * typical_ms)
+        if status_code >= 500:
+            response_time_ms *= 3
+
+        timestamp = self._start + timedelta(milliseconds=self._count)
+
+        return build_ims_access_event(
+            event_id="evt-{:09d}".format(self._count),
+            timestamp=timestamp.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            user_id=user_id,
+            email=email,
+            roles=roles,
+            ip_address="192.168.{}.{}".format(rng.randint(0, 255), rng.randint(1, 254)),
+            session_id="sess-{:06x}".format(rng.getrandbits(24)),
+            endpoint=endpoint,
+            method=method,
+            query_params={param: "{}-{:06d}".format(param[:3].lower(), rng.randint(0, 999999))},
+            status_code=status_code,
+            response_time_ms=response_time_ms,
+            referrer=referrer,
+        )
+
+
+def percentile(sorted_values, pct):
+    """Return the pct-th percentile of an already sorted list (nearest rank)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def run_load(sink, events, rate, seed=None, trace_memory=False):
+    """Send events to sink at rate events/second (0 = unthrottled) and return stats.
+
+    trace_memory turns on tracemalloc for the run. It slows every allocation
+    down by an order of magnitude, so throughput, latency and CPU figures of a
+    traced run only say something about memory.
+    """
+    generator = EventGenerator(seed=seed)
+    latencies = []
+
+    if trace_memory:
+        tracemalloc.start()
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_before = time.process_time()
+    start = time.perf_counter()
+
+    interval = 1.0 / rate if rate > 0 else 0.0
+    next_send = start
+
+    for _ in range(events):
+        if interval:
+            now = time.perf_counter()
+            if now < next_send:
+                time.sleep(next_send - now)
+            next_send += interval
+
+        event = generator.next_event()
+        severity = "ERROR" if event["payload"]["ims_access"]["status_code"] >= 500 else "INFO"
+
+        t0 = time.perf_counter()
+        sink.log_struct(event, severity=severity)
+        latencies.append(time.perf_counter() - t0)
+
+    sink.close()
+
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_before
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    if trace_memory:
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    else:
+        peak_bytes = None
+
+    latencies.sort()
+    per_thousand = 1000.0 / events if events else 0.0
+
+    return {
+        "events": events,
+        "target_rate": rate,
+        "elapsed_s": elapsed,
+        "throughput_eps": events / elapsed if elapsed else 0.0,
+        "latency_us": {
+            "p50": percentile(latencies, 50) * 1e6,
+            "p90": percentile(latencies, 90) * 1e6,
+            "p99": percentile(latencies, 99) * 1e6,
+            "max": (latencies[-1] if latencies else 0.0) * 1e6,
+        },
+        "cpu_ms_per_1k": cpu * 1000.0 * per_thousand,
+        "peak_traced_kb_per_1k": peak_bytes / 1024.0 * per_thousand if peak_bytes is not None else None,
+        # ru_maxrss is reported in kilobytes on Linux.
+        "max_rss_kb": usage_after.ru_maxrss,
+        "max_rss_growth_kb": usage_after.ru_maxrss - usage_before.ru_maxrss,
+    }
+
+
+def print_report(sink, stats):
+    """Print a human readable summary of a load run."""
+    print("Sink: {}".format(sink.name))
+    print("Events: {} (target rate: {})".format(
+        stats["events"], stats["target_rate"] or "unthrottled"))
+    print("Elapsed: {:.3f}s, throughput: {:.0f} events/s".format(
+        stats["elapsed_s"], stats["throughput_eps"]))
+    print("Latency (us): p50={p50:.1f} p90={p90:.1f} p99={p99:.1f} max={max:.1f}".format(
+        **stats["latency_us"]))
+    print("CPU: {:.2f} ms per 1k events".format(stats["cpu_ms_per_1k"]))
+    if stats["peak_traced_kb_per_1k"] is None:
+        traced = "peak traced n/a (--trace-memory)"
+    else:
+        traced = "{:.1f} KiB peak traced per 1k events".format(stats["peak_traced_kb_per_1k"])
+    print("Memory: {}, max RSS {} KiB (+{} KiB)".format(
+        traced, stats["max_rss_kb"], stats["max_rss_growth_kb"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the IMS access-log path.")
+    parser.add_argument("--events", type=int, default=10000, help="number of events to send")
+    parser.add_argument("--rate", type=float, default=1000,
+                        help="target events per second, 0 for as fast as possible")
+    parser.add_argument("--sink", choices=["null", "json", "jsonl"], default=None,
+                        help="null discards events, json uses json.dumps per event, "
+                             "jsonl uses JsonlSink (default: json with --output, else null)")
+    parser.add_argument("--output", help="file to write events to for the json/jsonl sinks")
+    parser.add_argument("--max-bytes", type=int, default=64 * 1024 * 1024,
+                        help="jsonl sink: rotate after this many bytes (0 disables)")
+    parser.add_argument("--max-age", type=float, default=3600,
+                        help="jsonl sink: rotate after this many seconds (0 disables)")
+    parser.add_argument("--rollup", action="store_true",
+                        help="aggregate api_call events with RollupSink before the sink")
+    parser.add_argument("--rollup-interval", type=float, default=60,
+                        help="rollup: seconds between rollup flushes")
+    parser.add_argument("--slow-ms", type=int, default=1000,
+                        help="rollup: forward calls at least this slow in full")
+    parser.add_argument("--sample-rate", type=float, default=0.01,
+                        help="rollup: fraction of fast successful calls forwarded in full")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed for reproducible runs")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="measure peak traced memory with tracemalloc; slows the run down "
+                             "a lot, so use a separate run for throughput, latency and CPU")
+    parser.add_argument("--json", action="store_true", help="print stats as JSON")
+    args = parser.parse_args()
+
+    sink_type = args.sink or ("json" if args.output else "null")
+    if sink_type != "null" and not args.output:
+        parser.error("--output is required for the {} sink".format(sink_type))
+
+    if sink_type == "jsonl":
+        sink = JsonlSink(args.output, max_bytes=args.max_bytes, max_age_s=args.max_age)
+    elif sink_type == "json":
+        sink = FileSink(args.output)
+    else:
+        sink = NullSink()
+
+    if args.rollup:
+        sink = RollupSink(sink, interval_s=args.rollup_interval, slow_ms=args.slow_ms,
+                          sample_rate=args.sample_rate, seed=args.seed)
+        # Flush on time even when the target rate leaves gaps between events
+        sink.start_flush_timer()
+
+    stats = run_load(sink, args.events, args.rate, seed=args.seed,
+                     trace_memory=args.trace_memory)
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        print_report(sink, stats)
+        if isinstance(sink, RollupSink):
+            print("Rollup: {} events in, {} forwarded in full, {} rollup events ({:.1%} of input)".format(
+                sink.events_in, sink.events_forwarded, sink.rollups_sent,
+                (sink.events_forwarded + sink.rollups_sent) / float(sink.events_in or 1)))
+            sink = sink.sink
+        if getattr(sink, "rotated", None):
+            print("Rotated segments: {}".format(len(sink.rotated)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,3 @@
-# # Imports the Google Cloud client library
-from google.cloud import logging
-
 # # Instantiates a client
 # logging_client = logging.Client()
 
@@ -17,8 +14,61 @@ from google.cloud import logging
 
 # print("Logged: {}".format(text))
 
+def build_ims_access_event(
+    event_id="evt-456789123",
+    timestamp="2025-06-23T15:45:12Z",
+    user_id="user-12345",
+    email="john.doe@hillspire.com",
+    roles=("Viewer",),
+    ip_address="192.168.1.101",
+    session_id="sess-abc123",
+    endpoint="/api/investments/holding-summary",
+    method="GET",
+    query_params=None,
+    status_code=200,
+    response_time_ms=120,
+    referrer="/dashboard",
+):
+    """Build an ims_access api_call event in the header/payload schema."""
+    if query_params is None:
+        query_params = {"investmentId": "inv-009876"}
+
+    return {
+  "header": {
+    "event_id": event_id,
+    "timestamp": timestamp,
+    "user": {
+      "user_id": user_id,
+      "email": email,
+      "roles": list(roles),
+      "ip_address": ip_address,
+      "session_id": session_id
+    },
+    "metadata": {
+      "source_system": "ims-web-app",
+      "app_version": "v2.3.1",
+      "env": "production"
+    }
+  },
+  "payload": {
+    "ims_access": {
+      "type": "api_call",
+      "endpoint": endpoint,
+      "method": method,
+      "query_params": query_params,
+      "status_code": status_code,
+      "response_time_ms": response_time_ms,
+      "referrer": referrer
+    }
+  }}
+
+
 def write_entry(logger_name):
     """Writes log entries to the given logger."""
+    # Imported here so load_gen.py can use build_ims_access_event() without
+    # the Google Cloud client library.
+    from google.cloud import logging
+
     logging_client = logging.Client()
 
     # This log can be found in the Cloud Logging console under 'Custom Logs'.
@@ -32,39 +82,12 @@ def write_entry(logger_name):
 
     # Struct log. The struct can be any JSON-serializable dictionary.
     logger.log_struct(
-        {
-  "header": {
-    "event_id": "evt-456789123",
-    "timestamp": "2025-06-23T15:45:12Z",
-    "user": {
-      "user_id": "user-12345",
-      "email": "john.doe@hillspire.com",
-      "roles": ["Viewer"],
-      "ip_address": "192.168.1.101",
-      "session_id": "sess-abc123"
-    },
-    "metadata": {
-      "source_system": "ims-web-app",
-      "app_version": "v2.3.1",
-      "env": "production"
-    }
-  },
-  "payload": {
-    "ims_access": {
-      "type": "api_call",
-      "endpoint": "/api/investments/holding-summary",
-      "method": "GET",
-      "query_params": {
-        "investmentId": "inv-009876"
-      },
-      "status_code": 200,
-      "response_time_ms": 120,
-      "referrer": "/dashboard"
-    }
-  }},
+        build_ims_access_event(),
         severity="INFO",
     )
 
     print("Wrote logs to {}.".format(logger.name))
 
-write_entry("my-log")
\ No newline at end of file
+
+if __name__ == "__main__":
+    write_entry("my-log")
@@ -0,0 +1,237 @@
+"""
+Client-side aggregation stage for ims_access api_call events.
+
+RollupSink sits in front of any sink with a log_struct(info, severity=...)
+method (Cloud Logging logger, JsonlSink, ...). For every api_call it keeps
+streaming counters and a latency histogram per (endpoint, method, status_code)
+and flushes them as one compact rollup event per key at a fixed interval.
+Errors and slow outliers are still forwarded in full; the remaining successful
+calls are forwarded only at the configured sample rate. api_call events missing
+any of the aggregated fields are forwarded in full as well.
+
+Windows are flushed when an event arrives after the interval has passed, when
+the host calls maybe_flush() (e.g. on a timer tick), or by the background
+thread started with start_flush_timer(), so idle traffic does not hold a
+window open.
+"""
+
+import random
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timezone, timedelta
+
+
+# Upper bounds (inclusive, in ms) of the latency histogram buckets; the last bucket is open.
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 75, 100, 150, 200, 300, 500, 750,
+                      1000, 1500, 2000, 3000, 5000, 10000]
+
+
+class LatencyHistogram:
+    """Fixed-bucket streaming histogram of response times with count/sum/min/max."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value_ms):
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if self.min is None or value_ms < self.min:
+            self.min = value_ms
+        if self.max is None or value_ms > self.max:
+            self.max = value_ms
+
+    def percentile(self, pct):
+        """Estimate a percentile as the upper bound of the bucket holding that rank."""
+        if not self.count:
+            return None
+        rank = max(1, int(round(pct / 100.0 * self.count)))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index < len(LATENCY_BUCKETS_MS):
+                    return min(LATENCY_BUCKETS_MS[index], self.max)
+                return self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum_ms": self.total,
+            "min_ms": self.min,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            # Sparse {upper bound: count}, "inf" for the open bucket.
+            "buckets": {
+                (str(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else "inf"): n
+                for i, n in enumerate(self.counts) if n
+            },
+        }
+
+
+class RollupSink:
+    """Aggregate api_call events and forward rollups, errors, outliers and samples.
+
+    sink: downstream object with log_struct(info, severity=...).
+    interval_s: how often rollup events are flushed; each rollup covers at most this long.
+    slow_ms: calls at or above this response time are forwarded in full.
+    error_status: calls with status_code at or above this are forwarded in full.
+    sample_rate: fraction (0.0-1.0) of the remaining calls forwarded in full.
+    """
+
+    def __init__(self, sink, interval_s=60, slow_ms=1000, error_status=400,
+                 sample_rate=0.01, seed=None):
+        self.sink = sink
+        self.name = "rollup({})".format(getattr(sink, "name", sink))
+        self.interval_s = interval_s
+        self.slow_ms = slow_ms
+        self.error_status = error_status
+        self.sample_rate = sample_rate
+        self._rng = random.Random(seed)
+
+        # (endpoint, method, status_code, metadata items) -> (metadata, LatencyHistogram)
+        self._histograms = {}
+        self._window_start = datetime.now(timezone.utc)
+        self._next_flush = time.monotonic() + interval_s
+        self._rollup_seq = 0
+        # Serializes aggregation, flushes and downstream writes with the flush timer thread
+        self._lock = threading.Lock()
+        self._timer_stop = None
+        self._timer = None
+
+        self.events_in = 0
+        self.events_forwarded = 0
+        self.rollups_sent = 0
+
+    def log_struct(self, info, severity=None):
+        with self._lock:
+            self.events_in += 1
+
+            if time.monotonic() >= self._next_flush:
+                self._flush()
+
+            try:
+                access = info["payload"]["ims_access"]
+                if access["type"] != "api_call":
+                    raise KeyError("type")
+                endpoint = access["endpoint"]
+                method = access["method"]
+                status_code = access["status_code"]
+                response_time_ms = access["response_time_ms"]
+                # Keys must sort against each other at flush time, and response
+                # times must be numbers for the histogram
+                if (type(endpoint) is not str or type(method) is not str or type(status_code) is not int
+                        or type(response_time_ms) not in (int, float)):
+                    raise TypeError("api_call fields of unexpected type")
+                forward = status_code >= self.error_status or response_time_ms >= self.slow_ms
+                metadata = info["header"].get("metadata") or {}
+                key = (endpoint, method, status_code, tuple(sorted(metadata.items())))
+                entry = self._histograms.get(key)
+            except (KeyError, TypeError, AttributeError):
+                # Not an api_call, or one we cannot aggregate: pass it on untouched
+                self._forward(info, severity)
+                return
+
+            if entry is None:
+                entry = self._histograms[key] = (dict(metadata), LatencyHistogram())
+            entry[1].add(response_time_ms)
+
+            if forward or self._rng.random() < self.sample_rate:
+                self._forward(info, severity)
+
+    def _forward(self, info, severity):
+        self.events_forwarded += 1
+        self.sink.log_struct(info, severity=severity)
+
+    def maybe_flush(self):
+        """Flush if the interval has passed; for hosts to call on a timer tick."""
+        with self._lock:
+            if time.monotonic() >= self._next_flush:
+                self._flush()
+
+    def flush(self):
+        """Send one rollup event per (endpoint, method, status_code, metadata) and start a new window."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        now = datetime.now(timezone.utc)
+        # A late flush (no events or ticks since the interval passed) still only
+        # covers the interval: nothing arrived after its scheduled end.
+        window_end = min(now, self._window_start + timedelta(seconds=self.interval_s))
+        window = {
+            "start": self._window_start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "end": window_end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+
+        # Start the next window first: if the downstream sink fails part way
+        # the rest of this window is dropped rather than sent twice later
+        histograms = self._histograms
+        self._histograms = {}
+        self._window_start = now
+        self._next_flush = time.monotonic() + self.interval_s
+
+        for key, (metadata, histogram) in sorted(histograms.items(),
+                                                 key=lambda item: (item[0][:3], str(item[0][3]))):
+            endpoint, method, status_code, _ = key
+            self._rollup_seq += 1
+            event = {
+                "header": {
+                    "event_id": "rollup-{}-{}".format(window_end.strftime("%Y%m%dT%H%M%S"),
+                                                      self._rollup_seq),
+                    "timestamp": window["end"],
+                    # Metadata of the aggregated events (source system, version, env)
+                    "metadata": metadata,
+                },
+                "payload": {
+                    "ims_access_rollup": {
+                        "type": "api_call",
+                        "window": window,
+                        "endpoint": endpoint,
+                        "method": method,
+                        "status_code": status_code,
+                        "response_time_ms": histogram.to_dict(),
+                    }
+                },
+            }
+            severity = "WARNING" if status_code >= self.error_status else "INFO"
+            self.sink.log_struct(event, severity=severity)
+            self.rollups_sent += 1
+
+    def start_flush_timer(self, tick_s=1.0):
+        """Call maybe_flush() every tick_s seconds from a daemon thread until close()."""
+        if self._timer is not None:
+            return
+        self._timer_stop = threading.Event()
+
+        def run():
+            while not self._timer_stop.wait(tick_s):
+                try:
+                    self.maybe_flush()
+                except Exception as e:
+                    # Keep ticking: a failing downstream write must not stop later flushes
+                    print("Rollup flush failed: {!r}".format(e))
+
+        self._timer = threading.Thread(target=run, name="rollup-flush", daemon=True)
+        self._timer.start()
+
+    def close(self):
+        """Flush the current window and close the downstream sink if it can be closed."""
+        if self._timer is not None:
+            self._timer_stop.set()
+            self._timer.join()
+            self._timer = None
+        self.flush()
+        close = getattr(self.sink, "close", None)
+        if close is not None:
+            close()
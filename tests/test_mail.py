@@ -0,0 +1,135 @@
+"""
+Round-trip tests for the streamed report email.
+
+A small SMTP stand-in on a local socket receives what send_email() writes,
+undoes the dot-stuffing and keeps the message; the tests parse it back and
+compare the decoded report with what was sent.
+"""
+
+import base64
+import email
+import socket
+import threading
+import unittest
+from unittest import mock
+
+from copilot_report import mail
+
+
+class SMTPStandIn:
+    """Single-connection SMTP server keeping the messages it receives."""
+
+    def __init__(self):
+        self.sock = socket.create_server(('127.0.0.1', 0))
+        self.port = self.sock.getsockname()[1]
+        self.messages = []
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.thread.join(10)
+        self.sock.close()
+
+    def _serve(self):
+        conn, _ = self.sock.accept()
+        with conn, conn.makefile('rb') as rfile:
+            def reply(line):
+                conn.sendall(line.encode('ascii') + b'\r\n')
+
+            reply('220 stand-in ready')
+            for line in rfile:
+                command = line.strip().split(b' ', 1)[0].upper()
+                if command == b'EHLO':
+                    reply('250-stand-in')
+                    reply('250 8BITMIME')
+                elif command == b'DATA':
+                    reply('354 end data with <CR><LF>.<CR><LF>')
+                    body = []
+                    for data_line in rfile:
+                        if data_line == b'.\r\n':
+                            break
+                        # Undo the dot-stuffing of lines starting with a period
+                        body.append(data_line[1:] if data_line.startswith(b'.') else data_line)
+                    self.messages.append(b''.join(body))
+                    reply('250 queued')
+                elif command == b'QUIT':
+                    reply('221 bye')
+                    return
+                else:
+                    reply('250 ok')
+
+
+def html_body(raw):
+    """Decode the text/html part of the raw message."""
+    msg = email.message_from_bytes(raw)
+    part = next(p for p in msg.walk() if p.get_content_type() == 'text/html')
+    return part.get_payload(decode=True).decode(part.get_content_charset())
+
+
+class SendEmailTest(unittest.TestCase):
+
+    def send(self, html_content, chunk_size):
+        server = SMTPStandIn()
+        self.addCleanup(server.close)
+        with mock.patch.multiple(mail, SMTP_HOST='127.0.0.1', SMTP_PORT=server.port,
+                                 SMTP_SSL=False, SMTP_CHUNK_SIZE=chunk_size):
+            recipients = ['to@example.com']
+            mail.send_email(mail.build_message(html_content, 'Report', recipients), recipients)
+        server.close()
+        self.assertEqual(len(server.messages), 1)
+        return server.messages[0]
+
+    def test_round_trip(self):
+        reports = {
+            'dot lines': '.\n<p>first</p>\n.. two dots\n.\r\n. trailing\n.',
+            'empty': '',
+            'non-ascii': '<p>Đã xem ✅ — réviews 🚀</p>\n' * 50,
+            'long': ''.join(f'<tr><td>{i}</td><td>.{i}</td></tr>\n' for i in range(2000)),
+        }
+        for name, html_content in reports.items():
+            # Chunk sizes that are not multiples of the 57-byte base64 line
+            for chunk_size in (1, 56, 58, 100, 1000):
+                with self.subTest(report=name, chunk_size=chunk_size):
+                    raw = self.send(html_content, chunk_size)
+                    self.assertEqual(html_body(raw), html_content)
+
+    def test_headers(self):
+        raw = self.send('<p>x</p>', 100)
+        msg = email.message_from_bytes(raw)
+        self.assertEqual(msg['Subject'], 'Report')
+        self.assertEqual(msg['To'], 'to@example.com')
+        self.assertEqual(msg.get_content_type(), 'multipart/alternative')
+
+
+class EncodeBase64ChunksTest(unittest.TestCase):
+
+    def test_matches_one_piece_encoding(self):
+        text = 'abc.é🚀\n' * 97
+        expected = base64.b64encode(text.encode('utf-8'))
+        for chunk_size in (1, 2, 7, 56, 57, 58, 114, 1000, 10 ** 6):
+            with self.subTest(chunk_size=chunk_size):
+                lines = b''.join(mail.encode_base64_chunks(text, chunk_size)).split(b'\r\n')
+                self.assertEqual(lines.pop(), b'')
+                self.assertTrue(all(len(line) <= 76 for line in lines))
+                self.assertEqual(b''.join(lines), expected)
+
+    def test_empty(self):
+        self.assertEqual(list(mail.encode_base64_chunks('', 10)), [])
+
+
+class SMTPDataWriterTest(unittest.TestCase):
+
+    def test_dot_stuffing_across_writes(self):
+        server = mock.Mock()
+        writer = mail.SMTPDataWriter(server)
+        for data in (b'.a\r\n', b'.', b'b\r\n.c', b'.d\r', b'\n.', b'', b'e\r\n'):
+            writer.write(data)
+        sent = b''.join(call.args[0] for call in server.send.call_args_list)
+        self.assertEqual(sent, b'..a\r\n..b\r\n..c.d\r\n..e\r\n')
+        self.assertEqual(writer.bytes_sent, len(sent))
+        self.assertEqual(writer.writes, 6)
+        self.assertTrue(writer.at_line_start)
+
+
+if __name__ == '__main__':
+    unittest.main()